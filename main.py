@@ -1,26 +1,37 @@
 import collections
+import ctypes
+import io
+import json
+import locale
+import re
+import socket
 import sys
 import subprocess
 import threading
 import time
 import os
-import cv2
 import numpy as np
 import psutil
 import requests
+from requests.adapters import HTTPAdapter
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QLabel, QPushButton, QComboBox,
     QHBoxLayout, QListWidget, QLineEdit, QFormLayout, QStackedWidget
 )
-from PyQt5.QtGui import QImage, QPixmap
-from PyQt5.QtCore import QTimer, Qt, QUrl
-from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
-from PyQt5.QtMultimediaWidgets import QVideoWidget
+from PyQt5.QtGui import QImage, QPainter
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
 import configparser
 import logging
+from dataclasses import dataclass, field, fields
 from concurrent.futures import ThreadPoolExecutor
-from queue import Queue, Full
-import vlc
+
+# Optional: list audio devices through Core Audio directly instead of spawning PowerShell
+try:
+    import comtypes
+    from pycaw.pycaw import AudioUtilities
+    from pycaw.constants import DEVICE_STATE, EDataFlow
+except ImportError:
+    AudioUtilities = None
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -29,25 +40,242 @@ logger = logging.getLogger(__name__)
 # Configuration file
 config_file = 'config.ini'
 
+# NGINX HTTP endpoint serving the RTMP module's status pages
+NGINX_HTTP_PORT = 8080
+NGINX_HTTP_URL = f'http://127.0.0.1:{NGINX_HTTP_PORT}'
+RTMP_STATUS_TTL = 0.5  # Seconds a server health check result stays valid
+
+# Local RTMP server states, see rtmp_server_state
+RTMP_DOWN = 'down'
+RTMP_STARTING = 'starting'
+RTMP_RUNNING = 'running'
+
+# NGINX-RTMP install; set STREAMLITER_NGINX to use a different directory
+NGINX_DIR = os.environ.get('STREAMLITER_NGINX', 'C:\\ProgrammingProjects\\StreamLiter\\nginx')
+NGINX_EXE = os.path.join(NGINX_DIR, 'nginx.exe')
+NGINX_PID_FILE = os.path.join(NGINX_DIR, 'logs', 'nginx.pid')  # Written by nginx for its master process
+# Directories nginx.conf expects to exist before the server starts
+NGINX_DIRS = (
+    os.path.join(NGINX_DIR, 'logs'),
+    os.path.join(NGINX_DIR, 'temp', 'hls'),
+    os.path.join(NGINX_DIR, 'temp', 'client_body_temp'),
+)
+
+# How many of FFmpeg's last stderr lines to keep for error reports
+FFMPEG_STDERR_TAIL = 200
+
+# Hardware H.264 encoders in order of preference, with their low-latency options
+HW_ENCODER_ARGS = {
+    'h264_nvenc': ['-tune', 'll', '-rc', 'cbr', '-zerolatency', '1', '-delay', '0'],
+    'h264_qsv': ['-async_depth', '1'],
+    'h264_amf': ['-usage', 'ultralowlatency', '-rc', 'cbr'],
+}
+# Each hardware encoder's speed/quality option, and its value for the High/Medium/Low quality presets
+HW_ENCODER_PRESETS = {
+    'h264_nvenc': ('-preset', {'High': 'p5', 'Medium': 'p3', 'Low': 'p1'}),
+    'h264_qsv': ('-preset', {'High': 'slow', 'Medium': 'medium', 'Low': 'veryfast'}),
+    'h264_amf': ('-quality', {'High': 'quality', 'Medium': 'balanced', 'Low': 'speed'}),
+}
+
+# Preview frame geometry (FFmpeg scales to this, RGB24) and the number of reusable frame buffers
+FRAME_WIDTH = 800
+FRAME_HEIGHT = 450
+FRAME_POOL_SIZE = 4  # The newest frame, the one on screen, and two for the capture thread to fill
+PREVIEW_FPS = 20
+STREAM_FPS = 30
+STREAM_URL = 'rtmp://localhost/live/stream'  # Local RTMP server
+# Fit any capture resolution into the fixed frame, letterboxing other aspect ratios instead of stretching
+PREVIEW_FILTER = (f'scale={FRAME_WIDTH}:{FRAME_HEIGHT}:force_original_aspect_ratio=decrease,'
+                  f'pad={FRAME_WIDTH}:{FRAME_HEIGHT}:(ow-iw)/2:(oh-ih)/2')
+
+# CPU reserved for the frame-reading thread; the capture FFmpeg runs on the others
+CAPTURE_CPU = 0
+THREAD_PRIORITY_HIGHEST = 2
+
+# `Get-AudioDevice -List` prints one blank-line separated record of "Key : Value" lines per device
+AUDIO_DEVICE_RECORD_SEPARATOR = re.compile(rb'(?:\r?\n){2,}')
+AUDIO_DEVICE_FIELD = re.compile(rb'^(\w+)[ \t]*:[ \t]*(.*?)\s*$', re.MULTILINE)
+
+
+def setting(section, key, default):
+    """Declare a Settings field stored as `key` in `section` of the config file."""
+    return field(default=default, metadata={'section': section, 'key': key})
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Application settings, parsed from the config file once per load or save."""
+    rtmp_url: str = setting('Streaming', 'rtmp_url', 'rtmp://localhost/live')
+    stream_key: str = setting('Streaming', 'stream_key', 'your_stream_key')
+    quality_preset: str = setting('Streaming', 'quality_preset', 'Medium')
+    preset: str = setting('Streaming', 'preset', 'veryfast')
+    crf: str = setting('Streaming', 'crf', '23')
+    maxrate: str = setting('Streaming', 'maxrate', '8M')
+    bufsize: str = setting('Streaming', 'bufsize', '10M')
+    video_res: str = setting('Video', 'resolution', '1920x1080')
+    human_input_device: str = setting('Audio', 'human_input_device', 'None')
+    system_audio_input_device: str = setting('Audio', 'system_audio_input_device', 'None')
+    local_rtmp_server: str = setting('RTMP', 'server', 'localhost')
+    local_rtmp_port: str = setting('RTMP', 'port', '1935')
+    ffmpeg_path: str = setting('FFmpeg', 'path', 'C:\\ProgrammingProjects\\StreamLiter\\ffmpeg\\bin\\ffmpeg.exe')
+    gop_size: str = setting('FFmpeg', 'gop_size', '30')
+    tune: str = setting('FFmpeg', 'tune', 'zerolatency')
+    fflags: str = setting('FFmpeg', 'fflags', 'nobuffer')
+    flags: str = setting('FFmpeg', 'flags', 'low_delay')
+    probesize: str = setting('FFmpeg', 'probesize', '32')
+
+    @classmethod
+    def from_configparser(cls, cp):
+        return cls(**{f.name: cp.get(f.metadata['section'], f.metadata['key'], fallback=f.default)
+                      for f in fields(cls)})
+
+    def to_configparser(self, cp):
+        """Store every field in `cp`, leaving other keys (e.g. the audio device cache) untouched."""
+        for f in fields(self):
+            section = f.metadata['section']
+            if not cp.has_section(section):
+                cp.add_section(section)
+            cp.set(section, f.metadata['key'], getattr(self, f.name))
+
+
+def load_config():
+    """Parse the config file into a new ConfigParser, which the caller owns and may modify."""
+    # No interpolation: stream keys and device names may contain '%', which must round-trip as-is
+    config = configparser.ConfigParser(interpolation=None)
+    config.read(config_file)
+    return config
+
+
+# Application-wide stylesheet, applied once to the main window. Status labels are coloured
+# through their `status` property so a status change never re-parses a stylesheet
+APP_QSS = """
+    QListWidget#sidebar {
+        background-color: #2b2b2b;
+        color: #ffffff;
+        font: 16px;
+    }
+    QListWidget#sidebar::item:selected {
+        background-color: #444444;
+        color: #ffffff;
+    }
+    QWidget#preview {
+        background-color: #2b2b2b;
+    }
+    QWidget#settings_group, QWidget#settings_group QWidget {
+        background-color: #2b2b2b;
+        color: #ffffff;
+        border: 1px solid #444444;
+    }
+    QLabel[status="red"] { font: 16px; color: red; }
+    QLabel[status="green"] { font: 16px; color: green; }
+    QLabel[status="orange"] { font: 16px; color: orange; }
+"""
+
+
+class PreviewWidget(QWidget):
+    """Paints the current preview frame straight from its QImage, without a QPixmap copy."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.image = None
+        # Paint the #preview background from the stylesheet while no frame has arrived
+        self.setAttribute(Qt.WA_StyledBackground)
+
+    def set_image(self, image):
+        self.image = image
+        self.update()
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.image is not None:
+            QPainter(self).drawImage(0, 0, self.image)
+
+
 class StreamLiterApp(QWidget):
+    # Status label styles, matched by the QLabel[status=...] rules in APP_QSS
+    STYLE_RED = "red"
+    STYLE_GREEN = "green"
+    STYLE_ORANGE = "orange"
+
+    # Emitted by the capture thread for every frame queued; delivered on the UI thread
+    frame_ready = pyqtSignal()
+    # Emitted with the freshly enumerated audio devices from the background worker
+    audio_devices_loaded = pyqtSignal(dict)
+    # Emitted by the background worker with the H.264 encoder that works on this machine
+    video_encoder_detected = pyqtSignal(str)
+    # Emitted by the background worker with whether FFmpeg can capture through ddagrab
+    ddagrab_detected = pyqtSignal(bool)
+    # Emitted by the NGINX launcher thread with whether the server came up
+    rtmp_server_started = pyqtSignal(bool)
+    # Emitted by the NGINX worker with whether the server processes were killed
+    rtmp_server_stopped = pyqtSignal(bool)
+    # Emitted by the background health check with whether the RTMP server answered
+    rtmp_probe_done = pyqtSignal(bool)
+    # Emitted by the Go Live worker with whether the RTMP server is up and whether the stream is already live
+    go_live_checked = pyqtSignal(bool, bool)
+    # Emitted by a capture thread with its generation when its FFmpeg fails
+    capture_failed = pyqtSignal(int)
+
     def __init__(self):
         super().__init__()
-        self.executor = ThreadPoolExecutor(max_workers=2)
-        self.frame_queue = Queue(maxsize=5)
+        # Slow, blocking jobs (e.g. PowerShell queries) run here, off the UI thread
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        # NGINX start and stop jobs, run one at a time in the order they were requested
+        self.rtmp_executor = ThreadPoolExecutor(max_workers=1)
+
+        # Keep-alive HTTP session for the NGINX status checks
+        self.http_session = requests.Session()
+        self.http_session.mount('http://', HTTPAdapter(pool_connections=2, pool_maxsize=2))
+
+        # Ring of preallocated frames: the capture thread is the only writer of frame_head and frame_latest,
+        # the UI thread the only writer of frame_tail and frame_shown, so plain int stores (atomic under
+        # the GIL) suffice. Only one capture thread runs at a time, see start_screen_capture
+        self.frame_ring = np.empty((FRAME_POOL_SIZE, FRAME_HEIGHT, FRAME_WIDTH, 3), np.uint8)
+        self.frame_head = 0  # Frames written so far
+        self.frame_latest = FRAME_POOL_SIZE - 1  # Slot holding the newest frame
+        self.frame_tail = 0  # Frames the preview has caught up to
+        self.frame_shown = -1  # Slot the preview paints from; the capture thread never writes into it
+        # The preview size is fixed, so each slot's QImage wrapper is built once
+        self.frame_images = [QImage(frame.data, FRAME_WIDTH, FRAME_HEIGHT, frame.strides[0], QImage.Format_RGB888)
+                             for frame in self.frame_ring]
+        # Per-pixel preview effects, applied in place to each frame before display
+        self.overlays = []
+        self.ffmpeg_process = None
+        self.capture_thread = None
+        # Held while a capture is replaced (generation bump, kill, spawn), so two restarts can't interleave
+        self.capture_lock = threading.Lock()
+        self.capture_command = None  # Command line of ffmpeg_process, to tell whether a restart is needed
+        # While live, the capture FFmpeg also encodes the RTMP stream, see build_capture_command
+        self.streaming = False
+        self.rtmp_server_process = None
+        self.nginx_dirs_ready = False
+        # State a start/stop was requested for (RTMP_RUNNING or RTMP_DOWN) until a health check confirms it
+        self._expected_state = None
+        # Set when a test stream is waiting for the RTMP server to finish starting
+        self.stream_after_server_start = False
+        self.capture_generation = 0
+        self.preview_connected = False
+        # Frames are only pushed to the UI while the Editor view (and its preview) is on screen
+        self.preview_visible = True
+        # True while a frame_ready signal is queued and not yet handled; further frames don't queue another
+        self.frame_signal_pending = False
+        # When process_frame last logged an error; it runs once per frame, so its errors are rate-limited
+        self._last_warn = 0.0
+        # Result and time of the last RTMP server probe; probes run off the UI thread, see refresh_rtmp_status
+        self._rtmp_alive = False
+        self._rtmp_checked_at = float('-inf')
+        self._rtmp_probe_pending = False
 
         # Set window properties
         self.setWindowTitle('StreamLiter')
         self.setGeometry(100, 100, 1024, 768)
+        self.setStyleSheet(APP_QSS)
 
         # Load settings from config file
-        self.config = configparser.ConfigParser()
-        self.config.read(config_file)
-
-        # Initialize audio devices
-        self.audio_devices = self.get_audio_devices()
+        self.config = load_config()
 
-        # Initialize VLC instance and media player
-        self.initialize_vlc()
+        # Show the audio devices seen last time; a fresh list is fetched in the background
+        self.audio_devices = self.load_cached_audio_devices()
 
         # Initialize UI elements first, so they exist before applying settings
         self.quality_preset_input = QComboBox(self)
@@ -55,6 +283,10 @@ class StreamLiterApp(QWidget):
         # Initialize video resolution and other settings
         self.update_application_settings()
 
+        # libx264 and gdigrab until the probes on the background worker report back
+        self.video_encoder = 'libx264'
+        self.use_ddagrab = False
+
         # Create a main layout
         main_layout = QVBoxLayout()
 
@@ -66,17 +298,7 @@ class StreamLiterApp(QWidget):
         self.sidebar.addItem("App Store")
         self.sidebar.addItem("Highlighter")
         self.sidebar.addItem("Settings")
-        self.sidebar.setStyleSheet("""
-            QListWidget {
-                background-color: #2b2b2b;
-                color: #ffffff;
-                font: 16px;
-            }
-            QListWidget::item:selected {
-                background-color: #444444;
-                color: #ffffff;
-            }
-        """)
+        self.sidebar.setObjectName("sidebar")
         self.stack = QStackedWidget()
 
         # Views
@@ -98,12 +320,12 @@ class StreamLiterApp(QWidget):
         main_layout.addLayout(h_layout)
 
         # Status Labels
-        self.local_rtmp_status_label = QLabel("Local RTMP Server: Not Running", self)
-        self.local_rtmp_status_label.setStyleSheet("font: 16px; color: red;")
-        self.connection_status_label = QLabel("Connection Status: Not Connected", self)
-        self.connection_status_label.setStyleSheet("font: 16px; color: red;")
-        self.streaming_status_label = QLabel("Streaming Status: Not Streaming", self)
-        self.streaming_status_label.setStyleSheet("font: 16px; color: red;")
+        self.local_rtmp_status_label = QLabel(self)
+        self.set_status(self.local_rtmp_status_label, "Local RTMP Server: Not Running", self.STYLE_RED)
+        self.connection_status_label = QLabel(self)
+        self.set_status(self.connection_status_label, "Connection Status: Not Connected", self.STYLE_RED)
+        self.streaming_status_label = QLabel(self)
+        self.set_status(self.streaming_status_label, "Streaming Status: Not Streaming", self.STYLE_RED)
         status_layout = QHBoxLayout()
         status_layout.addWidget(self.local_rtmp_status_label)
         status_layout.addWidget(self.connection_status_label)
@@ -123,112 +345,129 @@ class StreamLiterApp(QWidget):
         # Apply Layout
         self.setLayout(main_layout)
 
-        # Start FFmpeg capture in a separate thread
-        self.capture_thread = threading.Thread(target=self.ffmpeg_capture)
-        self.capture_thread.daemon = True
-        self.capture_thread.start()
+        # Update the preview as frames arrive instead of polling on a timer
+        self.frame_ready.connect(self.update_preview)
+        self.capture_failed.connect(self.on_capture_failed)
+        self.go_live_checked.connect(self.on_go_live_checked)
 
-        # Timer for updating the preview
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_preview)
+        # Start the raw-frame preview capture
+        self.start_screen_capture()
 
         # Connect sidebar selection to the stacked widget
         self.sidebar.currentRowChanged.connect(self.switch_view)
         self.sidebar.setCurrentRow(0)
 
-        # Check RTMP Server Status
-        self.check_rtmp_server_status()
-
-    def initialize_vlc(self):
-        try:
-            self.vlc_instance = vlc.Instance("--network-caching=50")
-            self.vlc_player = self.vlc_instance.media_player_new()
-            logger.info("VLC initialized successfully.")
-        except Exception as e:
-            logger.error(f"Failed to initialize VLC: {e}")
-
-    def start_preview(self):
+        # Check RTMP Server Status, then keep the label current; the TTL cache bounds the actual probes
+        self.rtmp_server_started.connect(self.on_rtmp_server_started)
+        self.rtmp_server_stopped.connect(self.on_rtmp_server_stopped)
+        self.rtmp_probe_done.connect(self.on_rtmp_probe_done)
+        self.refresh_rtmp_status()
+        self._status_timer = QTimer(self)
+        self._status_timer.timeout.connect(self.refresh_rtmp_status)
+        self._status_timer.start(1000)
+
+        # Refresh the audio device lists without blocking startup
+        self.audio_devices_loaded.connect(self.refresh_audio_devices)
+        self.executor.submit(self.get_audio_devices).add_done_callback(
+            lambda future: self.audio_devices_loaded.emit(future.result()))
+
+        # Probing the grabber and encoders launches FFmpeg several times, so it runs in the background too
+        self.ddagrab_detected.connect(self.on_ddagrab_detected)
+        self.executor.submit(self.detect_ddagrab).add_done_callback(
+            lambda future: self.ddagrab_detected.emit(future.result()))
+        self.video_encoder_detected.connect(self.on_video_encoder_detected)
+        self.executor.submit(self.detect_video_encoder).add_done_callback(
+            lambda future: self.video_encoder_detected.emit(future.result()))
+
+    def load_cached_audio_devices(self):
+        devices = {"Playback": ["None"], "Recording": ["None"]}
         try:
-            local_stream_url = f'rtmp://{self.local_rtmp_server}:{self.local_rtmp_port}/live/stream'
-            logger.info(f"Loading local preview stream from URL: {local_stream_url}")
-            media = self.vlc_instance.media_new(local_stream_url)
-            self.vlc_player.set_media(media)
-
-            # Set the player to render video in the correct widget
-            if sys.platform == "linux":  # for Linux using the X Server
-                self.vlc_player.set_xwindow(int(self.video_widget.winId()))
-            elif sys.platform == "win32":  # for Windows
-                self.vlc_player.set_hwnd(int(self.video_widget.winId()))
-            elif sys.platform == "darwin":  # for MacOS
-                self.vlc_player.set_nsobject(int(self.video_widget.winId()))
-
-            if self.vlc_player.play() == -1:
-                raise Exception("VLC failed to play the stream")
-
-            # Use a loop to check VLC status for a more robust status update
-            self.poll_vlc_status()
-
-        except Exception as e:
-            self.connection_status_label.setText("Connection Status: Failed to Load Stream")
-            self.connection_status_label.setStyleSheet("font: 16px; color: red;")
-            logger.error(f"Failed to load preview: {e}")
-
-    def check_vlc_status(self):
-        max_attempts = 10
-        attempts = 0
-
-        while attempts < max_attempts:
-            time.sleep(0.5)  # Wait for half a second before each check
-            if self.vlc_player.is_playing():
-                logger.info("Media player started successfully.")
-                self.connection_status_label.setText("Connection Status: Connected")
-                self.connection_status_label.setStyleSheet("font: 16px; color: green;")
-                return
-            attempts += 1
+            cached = json.loads(self.config.get('Audio', 'devices_cache', fallback='{}'))
+            # Hand-edited or stale caches may parse yet hold the wrong shape; only accept lists of names
+            if not isinstance(cached, dict):
+                raise TypeError(f"expected an object, got {type(cached).__name__}")
+            for kind in devices:
+                names = cached.get(kind, devices[kind])
+                if not isinstance(names, list) or not all(isinstance(name, str) for name in names):
+                    raise TypeError(f"{kind} is not a list of device names")
+                devices[kind] = names
+        except (ValueError, TypeError) as e:
+            logger.error(f"Ignoring invalid audio device cache: {e}")
+            devices = {"Playback": ["None"], "Recording": ["None"]}
+        return devices
 
-        logger.warning("Media player failed to start.")
-        self.connection_status_label.setText("Connection Status: Failed to Start")
-        self.connection_status_label.setStyleSheet("font: 16px; color: red;")
+    def refresh_audio_devices(self, devices):
+        """Repopulate the audio device combo boxes, keeping the current selections."""
+        if devices == self.audio_devices:
+            return
+        self.audio_devices = devices
+        for combo, kind in ((self.audio_human_input_device, "Recording"),
+                            (self.system_audio_input_device, "Playback")):
+            selected = combo.currentText()
+            combo.clear()
+            combo.addItems(devices[kind])
+            combo.setCurrentText(selected)
+
+        # Remember the list so the next launch can show it immediately
+        if not self.config.has_section('Audio'):
+            self.config.add_section('Audio')
+        self.config.set('Audio', 'devices_cache', json.dumps(devices))
+        with open(config_file, 'w') as configfile:
+            self.config.write(configfile)
+        logger.info("Audio device list updated.")
 
     def get_audio_devices(self):
+        if AudioUtilities is not None:
+            try:
+                return self.get_audio_devices_core_audio()
+            except Exception as e:
+                logger.error(f"Core Audio device enumeration failed, falling back to PowerShell: {e}")
+        return self.get_audio_devices_powershell()
+
+    def get_audio_devices_core_audio(self):
+        """List active audio endpoints through the MMDevice API (pycaw)."""
+        devices = {"Playback": ["None"], "Recording": ["None"]}
+        enumerator = endpoints = None
+        # Runs on the background worker, which has no COM apartment of its own
+        comtypes.CoInitialize()
+        try:
+            enumerator = AudioUtilities.GetDeviceEnumerator()
+            for kind, flow in (("Playback", EDataFlow.eRender), ("Recording", EDataFlow.eCapture)):
+                endpoints = enumerator.EnumAudioEndpoints(flow.value, DEVICE_STATE.ACTIVE.value)
+                for index in range(endpoints.GetCount()):
+                    devices[kind].append(AudioUtilities.CreateDevice(endpoints.Item(index)).FriendlyName)
+        finally:
+            # Release the interfaces while the apartment still exists; Release() after CoUninitialize can crash.
+            # Clearing them here also covers the error path, where the traceback keeps this frame alive
+            enumerator = endpoints = None
+            comtypes.CoUninitialize()
+        return devices
+
+    def get_audio_devices_powershell(self):
         # Using a PowerShell script to get audio devices
         devices = {"Playback": ["None"], "Recording": ["None"]}
         try:
             process = subprocess.Popen(
                 ["powershell", "-Command", "Get-AudioDevice -List"],
                 stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
+                stderr=subprocess.PIPE
             )
             output, error = process.communicate()
             if process.returncode == 0:
-                for line in output.splitlines():
-                    if "Playback" in line:
-                        devices["Playback"].append(line.split(":")[-1].strip())
-                    elif "Recording" in line:
-                        devices["Recording"].append(line.split(":")[-1].strip())
+                encoding = locale.getpreferredencoding(False)
+                for record in AUDIO_DEVICE_RECORD_SEPARATOR.split(output):
+                    fields = dict(AUDIO_DEVICE_FIELD.findall(record))
+                    kind = fields.get(b'Type', b'').decode('ascii', errors='replace')
+                    if kind in devices and b'Name' in fields:
+                        devices[kind].append(fields[b'Name'].decode(encoding, errors='replace'))
             else:
-                logger.error(f"Error getting audio devices: {error}")
+                logger.error(f"Error getting audio devices: {error.decode(errors='replace')}")
         except Exception as e:
             logger.error(f"Error getting audio devices: {e}")
         return devices
 
     def update_application_settings(self):
-        self.rtmp_url = self.config.get('Streaming', 'rtmp_url', fallback='rtmp://localhost/live')
-        self.stream_key = self.config.get('Streaming', 'stream_key', fallback='your_stream_key')
-        self.video_res = self.config.get('Video', 'resolution', fallback='1920x1080')
-        self.local_rtmp_server = self.config.get('RTMP', 'server', fallback='localhost')
-        self.local_rtmp_port = self.config.get('RTMP', 'port', fallback='1935')
-        self.preset = self.config.get('Streaming', 'preset', fallback='veryfast')
-        self.crf = self.config.get('Streaming', 'crf', fallback='23')
-        self.maxrate = self.config.get('Streaming', 'maxrate', fallback='8M')
-        self.bufsize = self.config.get('Streaming', 'bufsize', fallback='10M')
-        self.quality_preset = self.config.get('Streaming', 'quality_preset', fallback='Medium')
-        self.gop_size = self.config.get('FFmpeg', 'gop_size', fallback='30')
-        self.tune = self.config.get('FFmpeg', 'tune', fallback='zerolatency')
-        self.fflags = self.config.get('FFmpeg', 'fflags', fallback='nobuffer')
-        self.flags = self.config.get('FFmpeg', 'flags', fallback='low_delay')
-        self.probesize = self.config.get('FFmpeg', 'probesize', fallback='32')
+        self.settings = Settings.from_configparser(self.config)
         self.apply_quality_preset()
 
     def apply_quality_preset(self):
@@ -250,8 +489,112 @@ class StreamLiterApp(QWidget):
             self.maxrate_input.setText("4M")
             self.bufsize_input.setText("8M")
 
+    def ffmpeg_path(self):
+        """FFmpeg binary to run: the STREAMLITER_FFMPEG environment variable if set, else [FFmpeg] path."""
+        return os.environ.get('STREAMLITER_FFMPEG') or self.settings.ffmpeg_path
+
+    def detect_video_encoder(self):
+        """Return the first hardware H.264 encoder that opens on this machine, or libx264."""
+        try:
+            encoders = subprocess.run(
+                [self.ffmpeg_path(), '-hide_banner', '-encoders'],
+                capture_output=True,
+                text=True,
+                timeout=10
+            ).stdout
+            for encoder in HW_ENCODER_ARGS:
+                if encoder not in encoders:
+                    continue
+                # FFmpeg builds list every vendor encoder, so check one actually opens
+                probe = subprocess.run(
+                    [self.ffmpeg_path(), '-hide_banner', '-loglevel', 'error',
+                     '-f', 'lavfi', '-i', 'color=size=256x256:rate=1',
+                     '-frames:v', '1', '-c:v', encoder, '-f', 'null', '-'],
+                    capture_output=True,
+                    timeout=10
+                )
+                if probe.returncode == 0:
+                    logger.info(f"Using hardware encoder: {encoder}")
+                    return encoder
+        except Exception as e:
+            logger.error(f"Error detecting hardware encoders: {e}")
+        logger.info("No hardware encoder available, falling back to libx264.")
+        return 'libx264'
+
+    def detect_ddagrab(self):
+        """Return True if FFmpeg can capture the desktop with ddagrab (DXGI Desktop Duplication)."""
+        try:
+            filters = subprocess.run(
+                [self.ffmpeg_path(), '-hide_banner', '-filters'],
+                capture_output=True,
+                text=True,
+                timeout=10
+            ).stdout
+            if ' ddagrab ' in filters:
+                # Needs FFmpeg 6+ and a D3D11 device; it fails e.g. over Remote Desktop, so grab one frame
+                probe = subprocess.run(
+                    [self.ffmpeg_path(), '-hide_banner', '-loglevel', 'error',
+                     '-f', 'lavfi', '-i', 'ddagrab', '-vf', 'hwdownload,format=bgra',
+                     '-frames:v', '1', '-f', 'null', '-'],
+                    capture_output=True,
+                    timeout=10
+                )
+                if probe.returncode == 0:
+                    logger.info("Using ddagrab for screen capture.")
+                    return True
+        except Exception as e:
+            logger.error(f"Error detecting ddagrab: {e}")
+        logger.info("ddagrab not available, capturing the screen with gdigrab.")
+        return False
+
+    def on_ddagrab_detected(self, available):
+        if available and not self.use_ddagrab:
+            self.use_ddagrab = True
+            # Switch the preview capture over now; a live stream keeps gdigrab until its capture next restarts
+            if not self.streaming:
+                self.start_screen_capture()
+
+    def on_video_encoder_detected(self, encoder):
+        # Used from the next Go Live on; a stream already running keeps its encoder
+        self.video_encoder = encoder
+
+    def video_encoder_args(self, preset, tune):
+        """FFmpeg video codec options for the detected encoder. preset/tune only apply to libx264."""
+        if self.video_encoder in HW_ENCODER_ARGS:
+            # Hardware encoders take the vendor preset matching the quality preset, at the same constant bitrate
+            option, presets = HW_ENCODER_PRESETS[self.video_encoder]
+            return [
+                '-c:v', self.video_encoder,
+                option, presets.get(self.settings.quality_preset, presets['Medium']),
+                *HW_ENCODER_ARGS[self.video_encoder],
+                '-b:v', self.settings.maxrate, '-maxrate', self.settings.maxrate, '-bufsize', self.settings.bufsize
+            ]
+        return [
+            '-c:v', 'libx264', '-preset', preset, '-tune', tune,
+            # Constant bitrate and a fixed keyframe cadence, no scene-cut keyframes
+            '-b:v', self.settings.maxrate, '-maxrate', self.settings.maxrate, '-bufsize', self.settings.bufsize,
+            '-keyint_min', self.settings.gop_size, '-sc_threshold', '0',
+            # Slice threads split each frame across cores instead of queuing whole frames per thread
+            '-x264-params', 'nal-hrd=cbr:force-cfr=1:sliced-threads=1'
+        ]
+
+    def set_status(self, label, text, style):
+        """Update a status label, touching its text and style only when they change."""
+        # Repeated health checks usually report the same status, so most calls are no-ops
+        if label.text() != text:
+            label.setText(text)
+        if label.property('status') != style:
+            # Re-polish so the QLabel[status=...] rule from the window stylesheet takes effect
+            label.setProperty('status', style)
+            label.style().unpolish(label)
+            label.style().polish(label)
+
     def switch_view(self, index):
         self.stack.setCurrentIndex(index)
+        self.preview_visible = self.stack.currentWidget() is self.editor_view
+        if self.preview_visible:
+            # Frames kept arriving while hidden; show the newest one right away
+            self.update_preview()
 
     def create_editor_view(self):
         editor_layout = QVBoxLayout()
@@ -261,11 +604,11 @@ class StreamLiterApp(QWidget):
         self.source_combo.addItems(["Screen Capture", "Webcam", "Window Capture"])
         editor_layout.addWidget(self.source_combo)
 
-        # Create the video widget for stream preview
-        self.video_widget = QVideoWidget(self)
-        self.video_widget.setFixedSize(800, 450)  # Fixed size
-        self.video_widget.setStyleSheet("background-color: #2b2b2b;")
-        editor_layout.addWidget(self.video_widget)
+        # Create the widget that shows the raw preview frames
+        self.preview_widget = PreviewWidget(self)
+        self.preview_widget.setFixedSize(FRAME_WIDTH, FRAME_HEIGHT)  # Fixed size, matches the FFmpeg preview output
+        self.preview_widget.setObjectName("preview")
+        editor_layout.addWidget(self.preview_widget)
 
         # Create the switch source and go live buttons
         button_layout = QHBoxLayout()
@@ -291,109 +634,215 @@ class StreamLiterApp(QWidget):
 
         return editor_widget
 
-    def terminate_ffmpeg_process(self):
-        """Terminate any running FFmpeg process to avoid conflicts."""
-        for proc in psutil.process_iter(['pid', 'name']):
-            if 'ffmpeg' in proc.info['name']:
-                logger.info(f"Terminating existing FFmpeg process with PID: {proc.info['pid']}")
-                proc.kill()
-
-    def ffmpeg_capture(self):
-        # Ensure no other FFmpeg process is running
-        self.terminate_ffmpeg_process()
+    def terminate_ffmpeg_process(self, sweep_orphans=False):
+        """Terminate the FFmpeg process started by this app to avoid conflicts.
+
+        With sweep_orphans, also kill every other ffmpeg process on the system, e.g. one left
+        behind by a crashed session. That walks the whole process table, so it is opt-in.
+        """
+        process = self.ffmpeg_process
+        if process is not None and process.poll() is None:
+            logger.info(f"Terminating FFmpeg process with PID: {process.pid}")
+            process.kill()
+            process.wait(timeout=2)
+
+        if sweep_orphans:
+            for proc in psutil.process_iter(['name']):
+                if 'ffmpeg' in (proc.info['name'] or ''):
+                    logger.info(f"Terminating existing FFmpeg process with PID: {proc.pid}")
+                    proc.kill()
 
+    def pin_capture_thread(self):
+        """Pin the calling thread to CAPTURE_CPU and raise its priority (Windows only)."""
+        if sys.platform != 'win32' or os.cpu_count() < 2:
+            return
+        kernel32 = ctypes.windll.kernel32
+        kernel32.GetCurrentThread.restype = ctypes.c_void_p
+        kernel32.SetThreadAffinityMask.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+        kernel32.SetThreadPriority.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        thread = kernel32.GetCurrentThread()
+        if not kernel32.SetThreadAffinityMask(thread, 1 << CAPTURE_CPU):
+            logger.warning("Failed to pin the capture thread to its CPU.")
+        if not kernel32.SetThreadPriority(thread, THREAD_PRIORITY_HIGHEST):
+            logger.warning("Failed to raise the capture thread priority.")
+
+    def build_capture_command(self):
+        """FFmpeg command for the preview; while streaming, the same capture also feeds the encoder."""
+        framerate = STREAM_FPS if self.streaming else PREVIEW_FPS
         capture_command = [
-            'C:\\ProgrammingProjects\\StreamLiter\\ffmpeg\\bin\\ffmpeg.exe',
-            '-video_size', self.video_res,
-            '-framerate', '20',
-            '-f', 'gdigrab',
-            '-i', 'desktop',
+            self.ffmpeg_path(),
+            '-hide_banner', '-nostats',  # Keep stderr to real log lines
+            '-thread_queue_size', '1024',  # Keep the grabber from stalling on the demuxer queue
+            # Demuxer option: hand frames on without buffering them first
+            '-fflags', self.settings.fflags,
+        ]
+        if self.use_ddagrab:
+            # Desktop Duplication hands over GPU frames; copy each to system memory once for the filters below
+            capture_command += [
+                '-f', 'lavfi',
+                '-i', f'ddagrab=framerate={framerate}:video_size={self.settings.video_res}',
+            ]
+            download = 'hwdownload,format=bgra,'
+        else:
+            capture_command += [
+                '-video_size', self.settings.video_res,
+                '-framerate', str(framerate),
+                '-f', 'gdigrab',
+                '-rtbufsize', '256M',
+                '-i', 'desktop',
+            ]
+            download = ''
+
+        # Raw frames already scaled and in RGB order for Qt, no encoding
+        preview_output = ['-pix_fmt', 'rgb24', '-f', 'rawvideo', 'pipe:1']
+        if not self.streaming:
+            return capture_command + ['-vf', download + PREVIEW_FILTER, *preview_output]
+
+        # The desktop is grabbed once: split it, thin and scale one copy for the preview, encode the other
+        return capture_command + [
+            '-filter_complex',
+            f'[0:v]{download}split=2[stream][preview];[preview]fps={PREVIEW_FPS},{PREVIEW_FILTER}[preview_out]',
+            '-map', '[preview_out]', *preview_output,
+            '-map', '[stream]',
             '-pix_fmt', 'yuv420p',
-            '-c:v', 'libx264',
-            '-preset', 'ultrafast',  # Fastest encoding
-            '-tune', 'zerolatency',  # Tuning for low latency
-            '-g', '15',  # Smaller GOP for quicker keyframes
-            '-fflags', 'nobuffer',
-            '-flags', 'low_delay',
-            '-probesize', '32',
-            '-analyzeduration', '0',
+            *self.video_encoder_args(self.settings.preset, self.settings.tune),
+            '-g', self.settings.gop_size,
+            '-flags', self.settings.flags,
+            '-threads', '0',  # One encoder thread per core
+            # Hand packets to the RTMP connection as soon as they are encoded
+            '-max_interleave_delta', '0',
+            '-muxdelay', '0',
+            '-muxpreload', '0',
+            '-flvflags', 'no_duration_filesize',
             '-f', 'flv',
-            f'rtmp://{self.local_rtmp_server}:{self.local_rtmp_port}/live/stream'
+            STREAM_URL
         ]
 
-        logger.info(f"Starting FFmpeg with command: {' '.join(capture_command)}")
+    def ffmpeg_capture(self, generation, process):
+        """Read frames from a capture FFmpeg started by start_screen_capture into the ring."""
+        self.pin_capture_thread()
 
         try:
-            self.ffmpeg_process = subprocess.Popen(
-                capture_command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                bufsize=10 ** 8
-            )
+            stderr_thread, stderr_tail = self.drain_stderr(process)
 
-            while True:
-                if self.ffmpeg_process.poll() is not None:
-                    logger.error("FFmpeg process has terminated unexpectedly.")
-                    stderr_output = self.ffmpeg_process.stderr.read().decode('utf-8')
-                    if 'Already publishing' in stderr_output:
-                        logger.error("RTMP server is already publishing. Terminating FFmpeg process.")
-                    else:
-                        logger.error(f"FFmpeg stderr: {stderr_output}")
-                    self.connection_status_label.setText("Connection Status: FFmpeg Error")
-                    self.connection_status_label.setStyleSheet("font: 16px; color: red;")
-                    break
+            # Keep FFmpeg off the core the reading thread is pinned to
+            if sys.platform == 'win32' and os.cpu_count() > 1:
+                try:
+                    psutil.Process(process.pid).cpu_affinity(
+                        [cpu for cpu in range(os.cpu_count()) if cpu != CAPTURE_CPU])
+                except psutil.Error as e:
+                    # Only an optimisation; the stream must still be read, or FFmpeg stalls on a full pipe
+                    logger.warning(f"Failed to set the FFmpeg CPU affinity: {e}")
 
-                raw_frame = self.ffmpeg_process.stdout.read(1280 * 720 * 3)
-                if not raw_frame:
-                    logger.error("No data read from FFmpeg stdout. FFmpeg may have exited.")
-                    stderr_output = self.ffmpeg_process.stderr.read().decode('utf-8')
-                    logger.error(f"FFmpeg stderr: {stderr_output}")
-                    self.connection_status_label.setText("Connection Status: FFmpeg Error")
-                    self.connection_status_label.setStyleSheet("font: 16px; color: red;")
+            while True:
+                # Fill the slot after the newest frame, stepping over the one on screen
+                slot = (self.frame_latest + 1) % FRAME_POOL_SIZE
+                if slot == self.frame_shown:
+                    slot = (slot + 1) % FRAME_POOL_SIZE
+                if not self.read_frame(process.stdout, self.frame_ring[slot]):
+                    if generation != self.capture_generation:
+                        # Replaced by a newer capture; this process was killed on purpose
+                        return
+                    # Give the drain thread a moment to collect FFmpeg's last words
+                    stderr_thread.join(timeout=1)
+                    logger.error(f"No data read from FFmpeg stdout. FFmpeg may have exited "
+                                 f"(exit code {process.poll()}). Last FFmpeg output:\n" + '\n'.join(stderr_tail))
+                    self.capture_failed.emit(generation)
                     break
+                if generation != self.capture_generation:
+                    # Replaced while this read was in progress; the newer capture's reader owns the ring now
+                    return
 
-                try:
-                    self.frame_queue.put_nowait(raw_frame)
-                except Full:
-                    logger.warning("Frame queue is full. Dropping frame.")
-
-                time.sleep(0.005)
+                # Publish the frame; the UI always jumps to the newest one, so stale frames are dropped.
+                # frame_latest goes first, so a UI that sees the new frame_head also sees its slot
+                self.frame_latest = slot
+                self.frame_head += 1
+                if self.preview_visible and not self.frame_signal_pending:
+                    self.frame_signal_pending = True
+                    self.frame_ready.emit()
 
         except Exception as e:
             logger.error(f"Exception in ffmpeg_capture: {str(e)}")
-            self.connection_status_label.setText("Connection Status: FFmpeg Error")
-            self.connection_status_label.setStyleSheet("font: 16px; color: red;")
+            self.capture_failed.emit(generation)
+
+    def on_capture_failed(self, generation):
+        if generation != self.capture_generation:
+            return  # A newer capture already replaced the one that failed
+        self.set_status(self.connection_status_label, "Connection Status: FFmpeg Error", self.STYLE_RED)
+        if self.streaming:
+            # Most likely the RTMP output failed; fall back to a preview-only capture
+            self.streaming = False
+            self.set_status(self.streaming_status_label, "Streaming Status: Error", self.STYLE_RED)
+            self.start_screen_capture()
+
+    def drain_stderr(self, process):
+        """Forward an FFmpeg process's stderr to the log from a daemon thread.
+
+        FFmpeg blocks once the stderr pipe buffer fills, so the pipe must be read continuously.
+        Returns the thread and a deque holding the last FFMPEG_STDERR_TAIL lines, for error reports.
+        """
+        tail = collections.deque(maxlen=FFMPEG_STDERR_TAIL)
+
+        def drain():
+            # stderr is unbuffered (bufsize=0); buffer it so readline() isn't a byte-at-a-time loop
+            for line in io.BufferedReader(process.stderr):
+                line = line.decode('utf-8', errors='replace').rstrip()
+                tail.append(line)
+                logger.debug(f"FFmpeg[{process.pid}]: {line}")
+
+        thread = threading.Thread(target=drain, daemon=True)
+        thread.start()
+        return thread, tail
+
+    def read_frame(self, stream, buffer):
+        """Fill a preallocated frame buffer from an FFmpeg stdout pipe. Returns False on EOF."""
+        view = memoryview(buffer).cast('B')
+        filled = 0
+        while filled < len(view):
+            count = stream.readinto(view[filled:])
+            if not count:
+                return False
+            filled += count
+        return True
 
     def update_preview(self):
-        if not self.frame_queue.empty():
-            raw_frame = self.frame_queue.get()
-            frame = np.frombuffer(raw_frame, np.uint8).reshape((720, 1280, 3))
-            self.executor.submit(self.process_frame, frame)
-
-    def process_frame(self, frame):
+        # Clear before reading frame_head, so a frame published after the read queues a new signal
+        self.frame_signal_pending = False
+        head = self.frame_head
+        if head == self.frame_tail:
+            return
+        self.frame_tail = head
+
+        # Qt widgets may only be touched from the UI thread, so render inline
+        slot = self.frame_latest
+        self.frame_shown = slot
+        self.process_frame(slot)
+        if not self.preview_connected:
+            self.preview_connected = True
+            self.set_status(self.connection_status_label, "Connection Status: Connected", self.STYLE_GREEN)
+
+    def register_overlay(self, kernel):
+        """Add a preview overlay: a callable that modifies a (H, W, 3) uint8 RGB frame in place.
+
+        Kernels should be vectorised (NumPy, or a JIT-compiled function); the kernel is run once
+        on a blank frame here so any compilation cost is paid before the first real frame.
+        """
+        kernel(np.zeros((FRAME_HEIGHT, FRAME_WIDTH, 3), np.uint8))
+        self.overlays.append(kernel)
+
+    def process_frame(self, slot):
         try:
-            if frame is not None:
-                # Ensure proper scaling to match the preview label size
-                height, width, _ = frame.shape
-                aspect_ratio = width / height
-
-                scaled_height = self.video_widget.height()
-                scaled_width = int(scaled_height * aspect_ratio)
-
-                if scaled_width > self.video_widget.width():
-                    scaled_width = self.video_widget.width()
-                    scaled_height = int(scaled_width / aspect_ratio)
-
-                scaled_frame = cv2.resize(frame, (scaled_width, scaled_height))
-                scaled_frame = cv2.cvtColor(scaled_frame, cv2.COLOR_BGR2RGB)
-
-                img = QImage(scaled_frame.data, scaled_frame.shape[1], scaled_frame.shape[0], scaled_frame.strides[0],
-                             QImage.Format_RGB888)
-                self.video_widget.setPixmap(QPixmap.fromImage(img))
-            else:
-                logger.warning("No frame available for display.")
+            for overlay in self.overlays:
+                overlay(self.frame_ring[slot])
+            # Drawn straight from the ring buffer on the next paint; the capture thread
+            # leaves frame_shown alone until a newer frame takes its place
+            self.preview_widget.set_image(self.frame_images[slot])
         except Exception as e:
-            logger.error(f"Error in display_frame: {str(e)}")
+            # A persistent failure would otherwise log on every frame; once a second is enough
+            now = time.monotonic()
+            if now - self._last_warn > 1.0:
+                self._last_warn = now
+                logger.error(f"Error in display_frame: {str(e)}")
 
     def create_settings_view(self):
         settings_layout = QVBoxLayout()
@@ -402,38 +851,40 @@ class StreamLiterApp(QWidget):
         streaming_group = QVBoxLayout()
         streaming_group_box = QWidget()
         streaming_group_box.setLayout(streaming_group)
-        streaming_group_box.setStyleSheet("background-color: #2b2b2b; color: #ffffff; border: 1px solid #444444;")
+        streaming_group_box.setObjectName("settings_group")
 
         streaming_layout = QFormLayout()
 
         # Create settings fields
         self.rtmp_url_input = QLineEdit(self)
-        self.rtmp_url_input.setText(self.config.get('Streaming', 'rtmp_url', fallback='rtmp://localhost/live'))
+        self.rtmp_url_input.setText(self.settings.rtmp_url)
         streaming_layout.addRow('Stream RTMP URL:', self.rtmp_url_input)
 
         self.stream_key_input = QLineEdit(self)
-        self.stream_key_input.setText(self.config.get('Streaming', 'stream_key', fallback='your_stream_key'))
+        self.stream_key_input.setText(self.settings.stream_key)
         streaming_layout.addRow('Stream RTMP Key:', self.stream_key_input)
 
         self.video_res_input = QComboBox(self)
         self.video_res_input.addItems(["1920x1080", "1280x720", "640x480"])
-        self.video_res_input.setCurrentText(self.config.get('Video', 'resolution', fallback='1920x1080'))
+        self.video_res_input.setCurrentText(self.settings.video_res)
         streaming_layout.addRow('Streaming Resolution:', self.video_res_input)
 
         self.audio_human_input_device = QComboBox(self)
         self.audio_human_input_device.addItems(self.audio_devices["Recording"])
+        self.audio_human_input_device.setCurrentText(self.settings.human_input_device)
         streaming_layout.addRow('Human Audio Input Device:', self.audio_human_input_device)
 
         self.system_audio_input_device = QComboBox(self)
         self.system_audio_input_device.addItems(self.audio_devices["Playback"])
+        self.system_audio_input_device.setCurrentText(self.settings.system_audio_input_device)
         streaming_layout.addRow('System Audio Input Device:', self.system_audio_input_device)
 
         self.local_rtmp_server_input = QLineEdit(self)
-        self.local_rtmp_server_input.setText(self.config.get('RTMP', 'server', fallback='localhost'))
+        self.local_rtmp_server_input.setText(self.settings.local_rtmp_server)
         streaming_layout.addRow('Local RTMP Server:', self.local_rtmp_server_input)
 
         self.local_rtmp_port_input = QLineEdit(self)
-        self.local_rtmp_port_input.setText(self.config.get('RTMP', 'port', fallback='1935'))
+        self.local_rtmp_port_input.setText(self.settings.local_rtmp_port)
         streaming_layout.addRow('Local RTMP Port:', self.local_rtmp_port_input)
 
         streaming_group.addLayout(streaming_layout)
@@ -442,14 +893,14 @@ class StreamLiterApp(QWidget):
         ffmpeg_group = QVBoxLayout()
         ffmpeg_group_box = QWidget()
         ffmpeg_group_box.setLayout(ffmpeg_group)
-        ffmpeg_group_box.setStyleSheet("background-color: #2b2b2b; color: #ffffff; border: 1px solid #444444;")
+        ffmpeg_group_box.setObjectName("settings_group")
 
         ffmpeg_layout = QFormLayout()
 
         # Add Quality Preset Selection
         self.quality_preset_input = QComboBox(self)
         self.quality_preset_input.addItems(["High", "Medium", "Low"])
-        self.quality_preset_input.setCurrentText(self.config.get('Streaming', 'quality_preset', fallback='Medium'))
+        self.quality_preset_input.setCurrentText(self.settings.quality_preset)
         self.quality_preset_input.currentIndexChanged.connect(self.apply_quality_preset)
         ffmpeg_layout.addRow('Quality Preset:', self.quality_preset_input)
 
@@ -457,40 +908,40 @@ class StreamLiterApp(QWidget):
         self.preset_input = QComboBox(self)
         self.preset_input.addItems(
             ["ultrafast", "superfast", "veryfast", "faster", "fast", "medium", "slow", "slower", "veryslow"])
-        self.preset_input.setCurrentText(self.config.get('Streaming', 'preset', fallback='veryfast'))
+        self.preset_input.setCurrentText(self.settings.preset)
         ffmpeg_layout.addRow('FFmpeg Preset:', self.preset_input)
 
         self.crf_input = QLineEdit(self)
-        self.crf_input.setText(self.config.get('Streaming', 'crf', fallback='23'))
+        self.crf_input.setText(self.settings.crf)
         ffmpeg_layout.addRow('Constant Rate Factor (CRF):', self.crf_input)
 
         self.maxrate_input = QLineEdit(self)
-        self.maxrate_input.setText(self.config.get('Streaming', 'maxrate', fallback='8M'))
+        self.maxrate_input.setText(self.settings.maxrate)
         ffmpeg_layout.addRow('Max Bitrate (e.g., 8M):', self.maxrate_input)
 
         self.bufsize_input = QLineEdit(self)
-        self.bufsize_input.setText(self.config.get('Streaming', 'bufsize', fallback='10M'))
+        self.bufsize_input.setText(self.settings.bufsize)
         ffmpeg_layout.addRow('Buffer Size (e.g., 10M):', self.bufsize_input)
 
         self.gop_size_input = QLineEdit(self)
-        self.gop_size_input.setText(self.config.get('FFmpeg', 'gop_size', fallback='30'))
+        self.gop_size_input.setText(self.settings.gop_size)
         ffmpeg_layout.addRow('GOP Size:', self.gop_size_input)
 
         self.tune_input = QComboBox(self)
         self.tune_input.addItems(["zerolatency", "film", "animation", "grain"])
-        self.tune_input.setCurrentText(self.config.get('FFmpeg', 'tune', fallback='zerolatency'))
+        self.tune_input.setCurrentText(self.settings.tune)
         ffmpeg_layout.addRow('Tune:', self.tune_input)
 
         self.fflags_input = QLineEdit(self)
-        self.fflags_input.setText(self.config.get('FFmpeg', 'fflags', fallback='nobuffer'))
+        self.fflags_input.setText(self.settings.fflags)
         ffmpeg_layout.addRow('FFlags:', self.fflags_input)
 
         self.flags_input = QLineEdit(self)
-        self.flags_input.setText(self.config.get('FFmpeg', 'flags', fallback='low_delay'))
+        self.flags_input.setText(self.settings.flags)
         ffmpeg_layout.addRow('Flags:', self.flags_input)
 
         self.probesize_input = QLineEdit(self)
-        self.probesize_input.setText(self.config.get('FFmpeg', 'probesize', fallback='32'))
+        self.probesize_input.setText(self.settings.probesize)
         ffmpeg_layout.addRow('Probesize:', self.probesize_input)
 
         ffmpeg_group.addLayout(ffmpeg_layout)
@@ -509,130 +960,116 @@ class StreamLiterApp(QWidget):
         return settings_widget
 
     def save_settings(self):
-        self.config['Streaming'] = {
-            'rtmp_url': self.rtmp_url_input.text(),
-            'stream_key': self.stream_key_input.text(),
-            'quality_preset': self.quality_preset_input.currentText(),
-            'preset': self.preset_input.currentText(),
-            'crf': self.crf_input.text(),
-            'maxrate': self.maxrate_input.text(),
-            'bufsize': self.bufsize_input.text(),
-        }
-        self.config['Video'] = {
-            'resolution': self.video_res_input.currentText()
-        }
-        self.config['Audio'] = {
-            'human_input_device': self.audio_human_input_device.currentText(),
-            'system_audio_input_device': self.system_audio_input_device.currentText()
-        }
-        self.config['RTMP'] = {
-            'server': self.local_rtmp_server_input.text(),
-            'port': self.local_rtmp_port_input.text()
-        }
-        self.config['FFmpeg'] = {
-            'gop_size': self.gop_size_input.text(),
-            'tune': self.tune_input.currentText(),
-            'fflags': self.fflags_input.text(),
-            'flags': self.flags_input.text(),
-            'probesize': self.probesize_input.text()
-        }
+        self.settings = Settings(
+            rtmp_url=self.rtmp_url_input.text(),
+            stream_key=self.stream_key_input.text(),
+            quality_preset=self.quality_preset_input.currentText(),
+            preset=self.preset_input.currentText(),
+            crf=self.crf_input.text(),
+            maxrate=self.maxrate_input.text(),
+            bufsize=self.bufsize_input.text(),
+            video_res=self.video_res_input.currentText(),
+            human_input_device=self.audio_human_input_device.currentText(),
+            system_audio_input_device=self.system_audio_input_device.currentText(),
+            local_rtmp_server=self.local_rtmp_server_input.text(),
+            local_rtmp_port=self.local_rtmp_port_input.text(),
+            ffmpeg_path=self.settings.ffmpeg_path,  # Not editable in the UI
+            gop_size=self.gop_size_input.text(),
+            tune=self.tune_input.currentText(),
+            fflags=self.fflags_input.text(),
+            flags=self.flags_input.text(),
+            probesize=self.probesize_input.text(),
+        )
+        self.settings.to_configparser(self.config)
+        self.config.set('Audio', 'devices_cache', json.dumps(self.audio_devices))
         with open(config_file, 'w') as configfile:
             self.config.write(configfile)
         logger.info("Settings saved.")
 
-        # Update the application state to use the new settings
-        self.update_application_settings()
+        # The new settings are already in effect; re-apply the preset to the widgets as before
+        self.apply_quality_preset()
 
     def switch_source(self):
         source = self.source_combo.currentText()
         logger.info(f"Switching source to: {source}")
-
-        # Terminate any existing FFmpeg process to avoid RTMP conflicts
-        self.terminate_ffmpeg_process()
-
-        self.connection_status_label.setText("Connection Status: Starting Capture...")
-        self.connection_status_label.setStyleSheet("font: 16px; color: orange;")
-
-        # Give a short delay before starting the actual capture
-        QTimer.singleShot(1000, self.start_screen_capture)
+        self.start_screen_capture()
 
     def is_stream_active(self):
         """Check if the RTMP stream is already active."""
+        marker = f'<name>{self.settings.stream_key}</name>'.encode()
         try:
-            response = requests.get(f"http://127.0.0.1:8080/stat")
-            if response.status_code == 200:
-                if f'<name>{self.stream_key}</name>' in response.text:
-                    return True
-            return False
+            # Stream the stat page and stop reading as soon as the stream shows up
+            with self.http_session.get(f"{NGINX_HTTP_URL}/stat", stream=True, timeout=0.5) as response:
+                if response.status_code != 200:
+                    return False
+                return any(marker in line for line in response.iter_lines())
         except requests.exceptions.RequestException as e:
             logger.error(f"Failed to check RTMP stream status: {e}")
             return False
 
     def start_screen_capture(self):
-        # Ensure the RTMP server is running
-        if not self.is_rtmp_server_running():
-            logger.error("RTMP server is not running. Cannot start screen capture.")
-            self.connection_status_label.setText("Connection Status: RTMP Server Not Running")
-            self.connection_status_label.setStyleSheet("font: 16px; color: red;")
-            return
-
-        # Check if a stream is already active on the RTMP server
-        if self.is_stream_active():
-            logger.info("Stream is already active, not starting a new capture process.")
-            self.connection_status_label.setText("Connection Status: Already Streaming")
-            self.connection_status_label.setStyleSheet("font: 16px; color: green;")
-            return
-
-        # Terminate any existing FFmpeg process to avoid RTMP conflicts
-        self.terminate_ffmpeg_process()
-
-        # Add a short delay to ensure resources are released
-        time.sleep(2)
-
-        # Command for capturing the screen and streaming to RTMP
-        capture_command = [
-            'C:\\ProgrammingProjects\\StreamLiter\\ffmpeg\\bin\\ffmpeg.exe',
-            '-video_size', self.video_res,
-            '-framerate', '30',
-            '-f', 'gdigrab',
-            '-i', 'desktop',
-            '-pix_fmt', 'yuv420p',
-            '-c:v', 'libx264',
-            '-preset', self.preset,
-            '-tune', self.tune,
-            '-g', self.gop_size,
-            '-fflags', self.fflags,
-            '-flags', self.flags,
-            '-f', 'flv',
-            f'rtmp://{self.local_rtmp_server}:{self.local_rtmp_port}/live/stream'  # Output to local RTMP server
-        ]
-
-        try:
-            logger.info(f"Starting screen capture command: {' '.join(capture_command)}")
-            self.connection_status_label.setText("Connection Status: Capturing...")
-            self.connection_status_label.setStyleSheet("font: 16px; color: orange;")
-
-            self.ffmpeg_process = subprocess.Popen(
-                capture_command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
-            )
-
-            # Start checking the output stream and display it after a delay
-            QTimer.singleShot(3000, self.start_preview)
+        capture_command = self.build_capture_command()
+        with self.capture_lock:
+            if (self.ffmpeg_process is not None and self.ffmpeg_process.poll() is None
+                    and capture_command == self.capture_command):
+                # The running FFmpeg already produces exactly this; spawning a new one would only add a cold start
+                logger.info("FFmpeg is already capturing with these settings, keeping it.")
+                return
 
-        except Exception as e:
-            self.connection_status_label.setText("Connection Status: Error Occurred")
-            self.connection_status_label.setStyleSheet("font: 16px; color: red;")
-            logger.error(f"Failed to start screen capture: {e}")
+            # Any frames still coming from the previous capture are no longer wanted
+            self.capture_generation += 1
+            self.preview_connected = False
+
+            # Terminate any existing FFmpeg process to avoid conflicts
+            self.terminate_ffmpeg_process()
+            # Its reader sees EOF right after the kill; wait for it, so two readers never fill the ring at once
+            if self.capture_thread is not None:
+                self.capture_thread.join(timeout=2)
+                if self.capture_thread.is_alive():
+                    logger.warning("Previous capture thread did not stop in time.")
+
+            # Spawn here rather than on the capture thread, so ffmpeg_process is set before any later restart
+            logger.info(f"Starting FFmpeg with command: {' '.join(capture_command)}")
+            try:
+                self.ffmpeg_process = subprocess.Popen(
+                    capture_command,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    bufsize=0,
+                    creationflags=subprocess.HIGH_PRIORITY_CLASS if sys.platform == 'win32' else 0
+                )
+            except OSError as e:
+                self.ffmpeg_process = None
+                self.capture_command = None
+                logger.error(f"Failed to start FFmpeg: {e}")
+                self.set_status(self.connection_status_label, "Connection Status: FFmpeg Error", self.STYLE_RED)
+                return
+            self.capture_command = capture_command
+
+            self.set_status(self.connection_status_label, "Connection Status: Capturing...", self.STYLE_ORANGE)
+
+            # Read the frames in a separate thread
+            self.capture_thread = threading.Thread(target=self.ffmpeg_capture,
+                                                   args=(self.capture_generation, self.ffmpeg_process))
+            self.capture_thread.daemon = True
+            self.capture_thread.start()
+
+    def closeEvent(self, event):
+        """Stop the capture FFmpeg and its reader thread before the window goes away."""
+        self._status_timer.stop()
+        with self.capture_lock:
+            # A newer generation makes the reader treat the EOF from the kill below as intentional
+            self.capture_generation += 1
+            self.terminate_ffmpeg_process()
+        if self.capture_thread is not None:
+            self.capture_thread.join(timeout=2)
+        self.executor.shutdown(wait=False)
+        self.rtmp_executor.shutdown(wait=False)
+        super().closeEvent(event)
 
     def is_rtmp_server_running(self):
         """Check if the RTMP server is running."""
-        try:
-            response = requests.get("http://127.0.0.1:8080")
-            return response.status_code == 200
-        except requests.exceptions.RequestException:
-            return False
+        return self._probe_rtmp()
 
     def start_streaming_thread(self):
         # Run the streaming in a separate thread
@@ -640,140 +1077,257 @@ class StreamLiterApp(QWidget):
         streaming_thread.start()
 
     def start_streaming(self):
-        try:
-            self.streaming_status_label.setText("Streaming Status: Streaming...")
-            self.streaming_status_label.setStyleSheet("font: 16px; color: green;")
-
-            # Stream locally to RTMP server
-            stream_command = [
-                'C:\\ProgrammingProjects\\StreamLiter\\ffmpeg\\bin\\ffmpeg.exe',
-                '-video_size', f'{self.video_res}',
-                '-framerate', '30',
-                '-f', 'gdigrab',
-                '-i', 'desktop',
-                '-pix_fmt', 'yuv420p',
-                '-c:v', 'libx264',
-                '-preset', self.preset,
-                '-tune', self.tune,
-                '-g', self.gop_size,
-                '-fflags', self.fflags,
-                '-flags', self.flags,
-                '-probesize', self.probesize,
-                '-f', 'flv',
-                'rtmp://localhost/live/stream'  # Local RTMP server
-            ]
+        """Run Go Live's network checks on the worker thread; on_go_live_checked acts on the result."""
+        server_running = self.is_rtmp_server_running()
+        # The stat page can only list the stream while the server is up
+        self.go_live_checked.emit(server_running, server_running and self.is_stream_active())
 
-            logger.info(f"Starting FFmpeg with command: {' '.join(stream_command)}")
-            self.streaming_process = subprocess.Popen(stream_command)
+    def on_go_live_checked(self, server_running, stream_active):
+        # Ensure the RTMP server is running
+        if not server_running:
+            logger.error("RTMP server is not running. Cannot start streaming.")
+            self.set_status(self.streaming_status_label, "Streaming Status: Error - RTMP Server Not Running", self.STYLE_RED)
+            return
 
-        except Exception as e:
-            self.streaming_status_label.setText("Streaming Status: Error")
-            self.streaming_status_label.setStyleSheet("font: 16px; color: red;")
-            logger.error(f"Failed to start streaming: {e}")
+        # Check if a stream is already active on the RTMP server
+        if stream_active:
+            logger.info("Stream is already active, not starting a new streaming process.")
+            self.set_status(self.streaming_status_label, "Streaming Status: Already Streaming", self.STYLE_GREEN)
+            return
+
+        self.set_status(self.streaming_status_label, "Streaming Status: Streaming...", self.STYLE_GREEN)
+
+        # Restart the capture with the RTMP output added; it keeps feeding the preview as well
+        logger.info("Adding the RTMP stream to the capture FFmpeg.")
+        self.streaming = True
+        self.start_screen_capture()
 
     def start_local_rtmp_server(self):
+        """Launch NGINX off the UI thread; rtmp_server_started reports the outcome."""
+        if self._expected_state == RTMP_RUNNING:
+            return
+        self._expected_state = RTMP_RUNNING
+        self.set_status(self.local_rtmp_status_label, "Local RTMP Server: Starting...", self.STYLE_ORANGE)
+        # Queued behind any pending stop, so a restart never finds the old server still up
+        self.rtmp_executor.submit(self.launch_rtmp_server)
+
+    def launch_rtmp_server(self):
+        started = False
         try:
-            # Ensure required directories exist
-            nginx_logs_dir = 'C:\\ProgrammingProjects\\StreamLiter\\nginx\\logs'
-            nginx_temp_dir = 'C:\\ProgrammingProjects\\StreamLiter\\nginx\\temp'
-            os.makedirs(nginx_logs_dir, exist_ok=True)
-            os.makedirs(os.path.join(nginx_temp_dir, 'hls'), exist_ok=True)
-            os.makedirs(os.path.join(nginx_temp_dir, 'client_body_temp'), exist_ok=True)
-
-            # Start the NGINX server with correct working directory
-            nginx_path = 'C:\\ProgrammingProjects\\StreamLiter\\nginx\\nginx.exe'
-            nginx_dir = 'C:\\ProgrammingProjects\\StreamLiter\\nginx'
-            server_command = [nginx_path]
+            if self._port_open(NGINX_HTTP_PORT):
+                # Already up (e.g. started twice or by a previous run); a second nginx would fail to bind
+                logger.info("Local RTMP server is already running.")
+                started = True
+                return
+
+            self._ensure_dirs()
+
+            server_command = [NGINX_EXE]
 
             logger.info(f"Starting local RTMP server with command: {' '.join(server_command)}")
-            self.local_rtmp_status_label.setText("Local RTMP Server: Starting...")
-            self.local_rtmp_status_label.setStyleSheet("font: 16px; color: orange;")
 
             # Start the server with the working directory set to NGINX directory
-            self.rtmp_server_process = subprocess.Popen(server_command, cwd=nginx_dir)
-
-            # Wait a few seconds to allow the server to start
-            time.sleep(3)
+            self.rtmp_server_process = subprocess.Popen(server_command, cwd=NGINX_DIR)
 
-            # Check if the server is running
-            self.check_rtmp_server_status()
+            # Poll until the server answers, for up to 3 seconds
+            started = self._wait_until(self._probe_rtmp, 3)
 
-        except Exception as e:
-            self.local_rtmp_status_label.setText("Local RTMP Server: Not Running")
-            self.local_rtmp_status_label.setStyleSheet("font: 16px; color: red;")
+        except (OSError, subprocess.SubprocessError) as e:
             logger.error(f"Failed to start RTMP server: {e}")
+        finally:
+            # Always report back, so the UI never stays stuck in the starting state
+            self.rtmp_server_started.emit(started)
+
+    def on_rtmp_server_started(self, started):
+        if not started:
+            self._expected_state = None
+        # The launcher just probed the server, so record that instead of probing again
+        self.record_rtmp_status(started)
+
+        if self.stream_after_server_start:
+            self.stream_after_server_start = False
+            if started:
+                self.run_test_stream()
+            else:
+                self.set_status(self.streaming_status_label, "Streaming Status: Error - RTMP Server Not Running", self.STYLE_RED)
+                logger.error("Failed to start RTMP server.")
+
+    def _port_open(self, port, timeout=0.2):
+        """Return True if something accepts TCP connections on the given local port."""
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            return sock.connect_ex(('127.0.0.1', port)) == 0
+
+    def _ensure_dirs(self):
+        """Create the directories NGINX needs; only the first server start touches the filesystem."""
+        if self.nginx_dirs_ready:
+            return
+        for path in NGINX_DIRS:
+            os.makedirs(path, exist_ok=True)
+        self.nginx_dirs_ready = True
 
     def stop_local_rtmp_server(self):
+        """Kill NGINX off the UI thread; rtmp_server_stopped reports the outcome."""
+        logger.info("Stopping local RTMP server...")
+        # Let the status timer confirm the server is gone instead of waiting here
+        self._expected_state = RTMP_DOWN
+        self.set_status(self.local_rtmp_status_label, "Local RTMP Server: Stopping...", self.STYLE_ORANGE)
+        self.rtmp_executor.submit(self.halt_rtmp_server)
+
+    def halt_rtmp_server(self):
+        stopped = False
         try:
-            logger.info("Stopping local RTMP server...")
-
-            # Look for the nginx process and terminate it
-            for proc in psutil.process_iter(['pid', 'name']):
-                if proc.info['name'] == 'nginx.exe':
-                    proc.kill()
-                    logger.info(f"Terminated nginx process with PID: {proc.info['pid']}")
-
-            # Wait a few seconds to ensure the server stops
-            time.sleep(3)
-
-            # Check if the server is stopped
-            self.check_rtmp_server_status()
-
-        except Exception as e:
-            self.local_rtmp_status_label.setText("Local RTMP Server: Error Stopping")
-            self.local_rtmp_status_label.setStyleSheet("font: 16px; color: red;")
+            pid = self.nginx_pid()
+            if pid is not None:
+                # Kill the master together with its worker processes
+                self.kill_process_tree(pid)
+                if self.rtmp_server_process is not None:
+                    self.rtmp_server_process.wait(timeout=3)
+                logger.info(f"Terminated nginx process tree with PID: {pid}")
+            elif sys.platform == 'win32':
+                # No usable PID (e.g. the PID file is gone); let Windows kill the master and its workers by name
+                subprocess.run(['taskkill', '/F', '/IM', 'nginx.exe'], stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL, creationflags=subprocess.CREATE_NO_WINDOW,
+                               timeout=3, check=False)
+            else:
+                # Development builds off Windows; nginx has a master and worker processes,
+                # so kill every match rather than stopping at the first
+                for proc in psutil.process_iter(['name']):
+                    if proc.info['name'] == 'nginx.exe':
+                        proc.kill()
+                        logger.info(f"Terminated nginx process with PID: {proc.pid}")
+            self.rtmp_server_process = None
+            stopped = True
+
+        except (OSError, subprocess.SubprocessError, psutil.Error) as e:
             logger.error(f"Failed to stop RTMP server: {e}")
+        finally:
+            # Always report back, so the UI never stays stuck in the stopping state
+            self.rtmp_server_stopped.emit(stopped)
+
+    def on_rtmp_server_stopped(self, stopped):
+        if stopped:
+            # Probe now rather than trusting a result cached from before the kill
+            self._rtmp_checked_at = float('-inf')
+            self.refresh_rtmp_status()
+        elif self._expected_state == RTMP_DOWN:
+            self._expected_state = None
+            self.set_status(self.local_rtmp_status_label, "Local RTMP Server: Error Stopping", self.STYLE_RED)
+
+    def nginx_pid(self):
+        """PID of the nginx master: ours if this session started it, else the one in nginx's PID file."""
+        if self.rtmp_server_process is not None and self.rtmp_server_process.poll() is None:
+            return self.rtmp_server_process.pid
+        try:
+            with open(NGINX_PID_FILE) as pid_file:
+                pid = int(pid_file.read().strip())
+            # The file outlives a crashed nginx, so make sure the PID wasn't reused by another program
+            if psutil.Process(pid).name() == 'nginx.exe':
+                return pid
+        except (OSError, ValueError, psutil.Error):
+            pass
+        return None
+
+    def kill_process_tree(self, pid):
+        """Kill a process and all of its children."""
+        if sys.platform == 'win32':
+            subprocess.run(['taskkill', '/PID', str(pid), '/T', '/F'], stdout=subprocess.DEVNULL,
+                           stderr=subprocess.DEVNULL, creationflags=subprocess.CREATE_NO_WINDOW,
+                           timeout=3, check=False)
+        else:
+            process = psutil.Process(pid)
+            for child in process.children(recursive=True):
+                child.kill()
+            process.kill()
+
+    def _wait_until(self, pred, timeout, interval=0.1):
+        """Call pred every `interval` seconds until it returns True or `timeout` seconds pass."""
+        deadline = time.monotonic() + timeout
+        while not pred():
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(interval)
+        return True
+
+    def _probe_rtmp(self):
+        """Check whether the RTMP server accepts connections on its streaming port."""
+        try:
+            port = int(self.settings.local_rtmp_port)
+        except ValueError:
+            logger.error(f"Invalid local RTMP port: {self.settings.local_rtmp_port}")
+            return False
+        # A bare TCP connect is the cheapest proof the RTMP listener itself is up
+        return self._port_open(port, timeout=0.1)
+
+    def refresh_rtmp_status(self):
+        """Probe the RTMP server on a worker thread once the last result is older than RTMP_STATUS_TTL."""
+        if self._rtmp_probe_pending or time.monotonic() - self._rtmp_checked_at < RTMP_STATUS_TTL:
+            return
+        self._rtmp_probe_pending = True
+        threading.Thread(target=lambda: self.rtmp_probe_done.emit(self._probe_rtmp()), daemon=True).start()
+
+    def on_rtmp_probe_done(self, running):
+        self._rtmp_probe_pending = False
+        self.record_rtmp_status(running)
+
+    def record_rtmp_status(self, running):
+        if running != self._rtmp_alive:
+            logger.info("RTMP server is running." if running else "RTMP server is not running.")
+        self._rtmp_alive = running
+        self._rtmp_checked_at = time.monotonic()
+        self.check_rtmp_server_status()
 
     def check_rtmp_server_status(self):
-        try:
-            response = requests.get("http://127.0.0.1:8080")
-            if response.status_code == 200:
-                self.local_rtmp_status_label.setText("Local RTMP Server: Running")
-                self.local_rtmp_status_label.setStyleSheet("font: 16px; color: green;")
-                logger.info("RTMP server is running.")
-            else:
-                self.local_rtmp_status_label.setText("Local RTMP Server: Not Running")
-                self.local_rtmp_status_label.setStyleSheet("font: 16px; color: red;")
-                logger.info("RTMP server is not running.")
-        except requests.exceptions.RequestException:
-            self.local_rtmp_status_label.setText("Local RTMP Server: Not Running")
-            self.local_rtmp_status_label.setStyleSheet("font: 16px; color: red;")
-            logger.info("RTMP server is not running.")
+        """Update the server status label from the last probe result, without any network I/O."""
+        running = self._rtmp_alive
+
+        # A requested start/stop is done once the server is seen in that state
+        if self._expected_state is not None and running == (self._expected_state == RTMP_RUNNING):
+            self._expected_state = None
+
+        if self._expected_state is not None:
+            pass  # Still starting or stopping; keep showing that until the server catches up
+        elif running:
+            self.set_status(self.local_rtmp_status_label, "Local RTMP Server: Running", self.STYLE_GREEN)
+        else:
+            self.set_status(self.local_rtmp_status_label, "Local RTMP Server: Not Running", self.STYLE_RED)
+        return running
+
+    def rtmp_server_state(self):
+        """Return RTMP_RUNNING, RTMP_STARTING or RTMP_DOWN, using the cached health check."""
+        if self.check_rtmp_server_status():
+            return RTMP_RUNNING
+        return RTMP_STARTING if self._expected_state == RTMP_RUNNING else RTMP_DOWN
 
     def start_test_stream(self):
         try:
             # Check if the RTMP server is running
             logger.info("Checking RTMP server status...")
-            self.check_rtmp_server_status()
+            state = self.rtmp_server_state()
+            if state == RTMP_RUNNING:
+                self.run_test_stream()
+                return
 
-            if self.local_rtmp_status_label.text() != "Local RTMP Server: Running":
+            # The test stream starts once the server reports back
+            self.stream_after_server_start = True
+            if state == RTMP_STARTING:
+                logger.info("RTMP server is starting. Waiting for it...")
+            else:
                 logger.info("RTMP server not running. Attempting to start it...")
-
-                # Stop and restart the RTMP server with a delay
                 self.stop_local_rtmp_server()
-                time.sleep(2)  # Wait for 2 seconds
                 self.start_local_rtmp_server()
-                time.sleep(2)  # Wait for another 2 seconds to ensure server is ready
-
-                # Re-check the status
-                self.check_rtmp_server_status()
-                if self.local_rtmp_status_label.text() != "Local RTMP Server: Running":
-                    self.streaming_status_label.setText("Streaming Status: Error - RTMP Server Not Running")
-                    self.streaming_status_label.setStyleSheet("font: 16px; color: red;")
-                    logger.error("Failed to start RTMP server.")
-                    return
-
-            # If RTMP server is running, start streaming
-            logger.info("Starting test stream...")
-            rtmp_url = f"rtmp://127.0.0.1:1936/live/stream"
-            self.rtmp_url_input.setText(rtmp_url)
-            self.start_streaming_thread()
 
-        except Exception as e:
-            self.streaming_status_label.setText("Streaming Status: Error")
-            self.streaming_status_label.setStyleSheet("font: 16px; color: red;")
+        except (OSError, subprocess.SubprocessError) as e:
+            self.set_status(self.streaming_status_label, "Streaming Status: Error", self.STYLE_RED)
             logger.error(f"Failed to start test stream: {e}")
 
+    def run_test_stream(self):
+        # The RTMP server is running, start streaming
+        logger.info("Starting test stream...")
+        rtmp_url = f"rtmp://127.0.0.1:1936/live/stream"
+        self.rtmp_url_input.setText(rtmp_url)
+        self.start_streaming_thread()
+
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)